@@ -1,8 +1,14 @@
-from flask import Flask, render_template, send_from_directory
-import os
+from flask import Flask, render_template
 from app.db import DatabaseManager
 from app.routes import register_routes
 
+# Headers attached to every response by add_cors_headers
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,Authorization',
+    'Access-Control-Allow-Methods': 'GET,PUT,POST,DELETE,OPTIONS'
+}
+
 def create_app():
     app = Flask(__name__, static_folder='static', template_folder='templates')
     
@@ -17,18 +23,14 @@ def create_app():
     def index():
         return render_template('index.html')
     
-    # Favicon route to prevent 405 errors
-    @app.route('/favicon.ico')
-    def favicon():
-        return send_from_directory(os.path.join(app.root_path, 'static'),
-                                   'favicon.ico', mimetype='image/vnd.microsoft.icon')
+    # The page links the static favicon; redirect stray /favicon.ico requests
+    # there too so they don't fall through to the OPTIONS-only catch-all (405)
+    app.add_url_rule('/favicon.ico', 'favicon', redirect_to='/static/favicon.ico')
     
     # Add CORS headers to all responses
     @app.after_request
     def add_cors_headers(response):
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization'
-        response.headers['Access-Control-Allow-Methods'] = 'GET,PUT,POST,DELETE,OPTIONS'
+        response.headers.update(CORS_HEADERS)
         return response
     
     # Add handler for OPTIONS requests
@@ -1,5 +1,7 @@
 import sqlite3
 import os
+import itertools
+import queue
 from sqlite3 import Error
 from datetime import datetime
 
@@ -12,242 +14,392 @@ DATABASE_PATH = os.environ.get('DATABASE_PATH', default_db_path)
 
 # Ensure the directory for the database exists, especially for persistent disks
 db_dir = os.path.dirname(DATABASE_PATH)
-if not os.path.exists(db_dir):
-    os.makedirs(db_dir)
-
-class DatabaseManager:
-    @staticmethod
-    def get_connection():
-        """Create a database connection and return it"""
-        try:
-            conn = sqlite3.connect(DATABASE_PATH)
-            conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-            return conn
-        except Error as e:
-            print(f"Database connection error: {e}")
-            return None
-
-    @staticmethod
-    def init_db():
-        """Initialize the database with tables if they don't exist"""
-        connection = DatabaseManager.get_connection()
-        if connection:
-            try:
-                cursor = connection.cursor()
-                
-                # Create quotes table
-                cursor.execute('''
-                CREATE TABLE IF NOT EXISTS quotes (
-                    id                INTEGER PRIMARY KEY AUTOINCREMENT,
-                    customer          TEXT NOT NULL,
-                    quote_no          TEXT NOT NULL UNIQUE,
-                    description       TEXT,
-                    sales_rep         TEXT,
-                    project_sheet_url TEXT,
-                    mpsf_link         TEXT,
-                    folder_link       TEXT,
-                    method_link       TEXT,
-                    hidden            BOOLEAN DEFAULT 0,
-                    created_at        DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    updated_at        DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-                ''')
-                
-                # Add hidden column if it doesn't exist
-                cursor.execute("PRAGMA table_info(quotes)")
-                columns = [column[1] for column in cursor.fetchall()]
-                if 'hidden' not in columns:
-                    cursor.execute("ALTER TABLE quotes ADD COLUMN hidden BOOLEAN DEFAULT 0")
-                
-                # Add method_link column if it doesn't exist
-                if 'method_link' not in columns:
-                    cursor.execute("ALTER TABLE quotes ADD COLUMN method_link TEXT")
-                
-                # Create tasks table
-                cursor.execute('''
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id           INTEGER PRIMARY KEY AUTOINCREMENT,
-                    quote_id     INTEGER NOT NULL,
-                    label        TEXT NOT NULL,
-                    done         BOOLEAN DEFAULT 0,
-                    is_separator BOOLEAN DEFAULT 0,
-                    FOREIGN KEY(quote_id) REFERENCES quotes(id) ON DELETE CASCADE
-                )
-                ''')
-                
-                # Create vendor_quotes table
-                cursor.execute('''
-                CREATE TABLE IF NOT EXISTS vendor_quotes (
-                    id         INTEGER PRIMARY KEY AUTOINCREMENT,
-                    quote_id   INTEGER NOT NULL,
-                    type       TEXT CHECK(type IN ('freight','install','forward')) NOT NULL,
-                    vendor     TEXT NOT NULL,
-                    requested  BOOLEAN DEFAULT 0,
-                    entered    BOOLEAN DEFAULT 0,
-                    status     TEXT DEFAULT 'draft',
-                    notes      TEXT,
-                    date       DATE,
-                    FOREIGN KEY(quote_id) REFERENCES quotes(id) ON DELETE CASCADE
-                )
-                ''')
-                
-                # Create notes table
-                cursor.execute('''
-                CREATE TABLE IF NOT EXISTS notes (
-                    id         INTEGER PRIMARY KEY AUTOINCREMENT,
-                    quote_id   INTEGER NOT NULL,
-                    content    TEXT NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY(quote_id) REFERENCES quotes(id) ON DELETE CASCADE
-                )
-                ''')
-
-                # Create events table
-                cursor.execute('''
-                CREATE TABLE IF NOT EXISTS events (
-                    id         INTEGER PRIMARY KEY AUTOINCREMENT,
-                    quote_id   INTEGER NOT NULL,
-                    description TEXT NOT NULL,
-                    past        TEXT,
-                    present     TEXT,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY(quote_id) REFERENCES quotes(id) ON DELETE CASCADE
-                )
-                ''')
-
-                # Add past/present columns if they don't exist
-                cursor.execute("PRAGMA table_info(events)")
-                event_columns = [column[1] for column in cursor.fetchall()]
-                if 'past' not in event_columns:
-                    cursor.execute("ALTER TABLE events ADD COLUMN past TEXT")
-                if 'present' not in event_columns:
-                    cursor.execute("ALTER TABLE events ADD COLUMN present TEXT")
-                
-                # Create vendors table
-                cursor.execute('''
-                CREATE TABLE IF NOT EXISTS vendors (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    contact_name TEXT,
-                    email TEXT,
-                    phone TEXT,
-                    specialization TEXT,
-                    is_active BOOLEAN DEFAULT 1,
-                    notes TEXT,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-                ''')
-
-                # Create sales_reps table
-                cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sales_reps (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE,
-                    email TEXT UNIQUE,
-                    phone TEXT,
-                    is_active BOOLEAN DEFAULT 1,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-                ''')
-
-                # Create email_history table
-                cursor.execute('''
-                CREATE TABLE IF NOT EXISTS email_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    quote_id INTEGER NOT NULL,
-                    vendor_quote_id INTEGER NOT NULL,
-                    vendor_id INTEGER NOT NULL,
-                    to_email TEXT NOT NULL,
-                    subject TEXT NOT NULL,
-                    body TEXT NOT NULL,
-                    template_id INTEGER,
-                    sent_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    status TEXT DEFAULT 'sent',
-                    gas_response TEXT NULL,
-                    FOREIGN KEY(quote_id) REFERENCES quotes(id),
-                    FOREIGN KEY(vendor_quote_id) REFERENCES vendor_quotes(id),
-                    FOREIGN KEY(vendor_id) REFERENCES vendors(id),
-                    FOREIGN KEY(template_id) REFERENCES email_templates(id)
-                )
-                ''')
-
-                # Reset email_templates table to specialty-based system
-                cursor.execute("PRAGMA table_info(email_templates)")
-                template_columns = [column[1] for column in cursor.fetchall()]
-
-                # Check if we need to migrate from old vendor-based structure
-                if 'vendor_id' in template_columns:
-                    print("Converting email_templates table to specialty-based system...")
-                    # Drop old table and recreate with new structure
-                    cursor.execute("DROP TABLE IF EXISTS email_templates")
-                    print("Old templates deleted.")
-
-                # Create new specialty-based table (if it doesn't exist)
-                cursor.execute('''
-                CREATE TABLE IF NOT EXISTS email_templates (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    specialty TEXT NOT NULL CHECK(specialty IN ('freight', 'install', 'forward', 'general')),
-                    subject_template TEXT NOT NULL,
-                    body_template TEXT NOT NULL,
-                    is_default BOOLEAN DEFAULT 0,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-                ''')
-
-                # Add email_status column to email_history if it doesn't exist
-                cursor.execute("PRAGMA table_info(email_history)")
-                email_history_columns = [column[1] for column in cursor.fetchall()]
-                if 'email_status' not in email_history_columns:
-                    cursor.execute("ALTER TABLE email_history ADD COLUMN email_status TEXT DEFAULT 'current'")
-
-                # Add cc_emails column to email_history if it doesn't exist
-                if 'cc_emails' not in email_history_columns:
-                    cursor.execute("ALTER TABLE email_history ADD COLUMN cc_emails TEXT DEFAULT '[]'")
-
-                # Add bcc_emails column to email_history if it doesn't exist
-                if 'bcc_emails' not in email_history_columns:
-                    cursor.execute("ALTER TABLE email_history ADD COLUMN bcc_emails TEXT DEFAULT '[]'")
-
-                # Add status column to vendor_quotes if it doesn't exist
-                cursor.execute("PRAGMA table_info(vendor_quotes)")
-                vendor_quotes_columns = [column[1] for column in cursor.fetchall()]
-                if 'status' not in vendor_quotes_columns:
-                    cursor.execute("ALTER TABLE vendor_quotes ADD COLUMN status TEXT DEFAULT 'draft'")
-
-                # Add sales_rep_id column to quotes table if it doesn't exist (for migration)
-                cursor.execute("PRAGMA table_info(quotes)")
-                quotes_columns = [column[1] for column in cursor.fetchall()]
-                if 'sales_rep_id' not in quotes_columns:
-                    cursor.execute("ALTER TABLE quotes ADD COLUMN sales_rep_id INTEGER")
-                    # Add foreign key constraint (will be enforced after data migration)
-                    print("Added sales_rep_id column to quotes table")
-
-                # Create indexes for email tables
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_templates_specialty ON email_templates(specialty)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_templates_is_default ON email_templates(is_default)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_history_quote_id ON email_history(quote_id)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_history_vendor_id ON email_history(vendor_id)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_history_vendor_quote_id ON email_history(vendor_quote_id)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_history_email_status ON email_history(email_status)")
-
-                # Create indexes for sales_reps table
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_reps_name ON sales_reps(name)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_reps_email ON sales_reps(email)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_reps_active ON sales_reps(is_active)")
-
-                # Create default specialty templates if they don't exist
-                cursor.execute("SELECT COUNT(*) FROM email_templates")
-                if cursor.fetchone()[0] == 0:
-                    print("Creating default specialty email templates...")
-
-                    # Default templates for each specialty
-                    default_templates = [
-                        ('General Quote Request', 'general', True,
-                         "Quote Request - {customer} - {quote_no}",
-                         '''Dear {contact_name},
+if db_dir:
+    os.makedirs(db_dir, exist_ok=True)
+
+# Per-connection tuning applied to every new connection. journal_mode=WAL is
+# persistent in the database file, so init_db sets it once instead.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",    # WAL is crash-safe with NORMAL; skips an fsync per commit
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",     # 64 MB page cache
+    "PRAGMA mmap_size = 268435456",   # 256 MB memory-mapped reads
+)
+
+# Prepared statements kept per connection, keyed by SQL text. With pooled
+# connections the cache stays warm, so repeated queries skip re-parsing.
+STATEMENT_CACHE_SIZE = 256
+
+# Number of idle connections DatabaseContext keeps open for reuse
+POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 5))
+
+# Pooled connections run PRAGMA optimize every this many releases, and again
+# when they are closed
+OPTIMIZE_INTERVAL = 500
+
+def _table_columns(cursor, table):
+    """Return the column names of a table, or an empty set if it doesn't exist"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {column[1] for column in cursor}
+
+
+def _upgrade_unversioned_schema(cursor):
+    """Migration 1: add columns introduced before the schema was versioned.
+
+    Runs ahead of the CREATE TABLE statements, so a table that doesn't exist
+    yet is skipped here and created with its current columns instead.
+    """
+    quotes_columns = _table_columns(cursor, 'quotes')
+    if quotes_columns:
+        if 'hidden' not in quotes_columns:
+            cursor.execute("ALTER TABLE quotes ADD COLUMN hidden BOOLEAN DEFAULT 0")
+        if 'method_link' not in quotes_columns:
+            cursor.execute("ALTER TABLE quotes ADD COLUMN method_link TEXT")
+        if 'sales_rep_id' not in quotes_columns:
+            cursor.execute("ALTER TABLE quotes ADD COLUMN sales_rep_id INTEGER")
+            print("Added sales_rep_id column to quotes table")
+
+    event_columns = _table_columns(cursor, 'events')
+    if event_columns:
+        if 'past' not in event_columns:
+            cursor.execute("ALTER TABLE events ADD COLUMN past TEXT")
+        if 'present' not in event_columns:
+            cursor.execute("ALTER TABLE events ADD COLUMN present TEXT")
+
+    # Old vendor-based templates are dropped; init_db recreates the table
+    # with the specialty-based structure
+    if 'vendor_id' in _table_columns(cursor, 'email_templates'):
+        print("Converting email_templates table to specialty-based system...")
+        cursor.execute("DROP TABLE IF EXISTS email_templates")
+        print("Old templates deleted.")
+
+    email_history_columns = _table_columns(cursor, 'email_history')
+    if email_history_columns:
+        if 'email_status' not in email_history_columns:
+            cursor.execute("ALTER TABLE email_history ADD COLUMN email_status TEXT DEFAULT 'current'")
+        if 'cc_emails' not in email_history_columns:
+            cursor.execute("ALTER TABLE email_history ADD COLUMN cc_emails TEXT DEFAULT '[]'")
+        if 'bcc_emails' not in email_history_columns:
+            cursor.execute("ALTER TABLE email_history ADD COLUMN bcc_emails TEXT DEFAULT '[]'")
+
+    vendor_quotes_columns = _table_columns(cursor, 'vendor_quotes')
+    if vendor_quotes_columns and 'status' not in vendor_quotes_columns:
+        cursor.execute("ALTER TABLE vendor_quotes ADD COLUMN status TEXT DEFAULT 'draft'")
+
+
+def _drop_superseded_indexes(cursor):
+    """Migration 2: drop single-column indexes now covered by the composite
+    indexes in SCHEMA_SQL, which lead with the same column"""
+    cursor.execute("DROP INDEX IF EXISTS idx_email_history_quote_id")
+    cursor.execute("DROP INDEX IF EXISTS idx_vendor_quotes_new_quote_id")
+
+
+def _drop_email_history_fk_indexes(cursor):
+    """Migration 3: drop the email_history vendor indexes replaced by
+    (vendor_id, sent_at) and (vendor_quote_id, sent_at) in SCHEMA_SQL"""
+    cursor.execute("DROP INDEX IF EXISTS idx_email_history_vendor_id")
+    cursor.execute("DROP INDEX IF EXISTS idx_email_history_vendor_quote_id")
+
+
+# Trigram full-text index over email_history subject and recipient, kept in
+# sync by triggers. Trigram tables answer LIKE '%term%' from the index when
+# the term has at least three characters.
+EMAIL_HISTORY_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS email_history_fts USING fts5(
+    subject, to_email,
+    content='email_history', content_rowid='id', tokenize='trigram'
+)""",
+    """CREATE TRIGGER IF NOT EXISTS email_history_fts_insert AFTER INSERT ON email_history BEGIN
+    INSERT INTO email_history_fts(rowid, subject, to_email)
+    VALUES (new.id, new.subject, new.to_email);
+END""",
+    """CREATE TRIGGER IF NOT EXISTS email_history_fts_delete AFTER DELETE ON email_history BEGIN
+    INSERT INTO email_history_fts(email_history_fts, rowid, subject, to_email)
+    VALUES ('delete', old.id, old.subject, old.to_email);
+END""",
+    """CREATE TRIGGER IF NOT EXISTS email_history_fts_update AFTER UPDATE OF subject, to_email ON email_history BEGIN
+    INSERT INTO email_history_fts(email_history_fts, rowid, subject, to_email)
+    VALUES ('delete', old.id, old.subject, old.to_email);
+    INSERT INTO email_history_fts(rowid, subject, to_email)
+    VALUES (new.id, new.subject, new.to_email);
+END""",
+)
+
+
+def _add_email_history_fts(cursor):
+    """Migration 4: build the email_history full-text index from existing rows"""
+    if _table_columns(cursor, 'email_history'):
+        for statement in EMAIL_HISTORY_FTS_DDL:
+            cursor.execute(statement)
+        cursor.execute("INSERT INTO email_history_fts(email_history_fts) VALUES ('rebuild')")
+
+
+def _denormalize_email_history_names(cursor):
+    """Migration 5: store vendor name and quote number on email_history rows
+    so history reads don't need to join vendors and quotes"""
+    columns = _table_columns(cursor, 'email_history')
+    if not columns:
+        return
+    if 'vendor_name' not in columns:
+        cursor.execute("ALTER TABLE email_history ADD COLUMN vendor_name TEXT")
+    if 'quote_no' not in columns:
+        cursor.execute("ALTER TABLE email_history ADD COLUMN quote_no TEXT")
+    if _table_columns(cursor, 'vendors') and _table_columns(cursor, 'quotes'):
+        cursor.execute("""
+            UPDATE email_history
+            SET vendor_name = (SELECT name FROM vendors WHERE vendors.id = email_history.vendor_id),
+                quote_no = (SELECT quote_no FROM quotes WHERE quotes.id = email_history.quote_id)
+        """)
+
+
+def _drop_email_templates_specialty_index(cursor):
+    """Migration 6: drop the specialty index replaced by
+    (specialty, is_default, name) in SCHEMA_SQL"""
+    cursor.execute("DROP INDEX IF EXISTS idx_email_templates_specialty")
+
+
+# Trigram full-text index over the searchable email_templates columns, kept in
+# sync by triggers the same way as email_history_fts
+EMAIL_TEMPLATES_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS email_templates_fts USING fts5(
+    name, specialty, subject_template, body_template,
+    content='email_templates', content_rowid='id', tokenize='trigram'
+)""",
+    """CREATE TRIGGER IF NOT EXISTS email_templates_fts_insert AFTER INSERT ON email_templates BEGIN
+    INSERT INTO email_templates_fts(rowid, name, specialty, subject_template, body_template)
+    VALUES (new.id, new.name, new.specialty, new.subject_template, new.body_template);
+END""",
+    """CREATE TRIGGER IF NOT EXISTS email_templates_fts_delete AFTER DELETE ON email_templates BEGIN
+    INSERT INTO email_templates_fts(email_templates_fts, rowid, name, specialty, subject_template, body_template)
+    VALUES ('delete', old.id, old.name, old.specialty, old.subject_template, old.body_template);
+END""",
+    """CREATE TRIGGER IF NOT EXISTS email_templates_fts_update
+AFTER UPDATE OF name, specialty, subject_template, body_template ON email_templates BEGIN
+    INSERT INTO email_templates_fts(email_templates_fts, rowid, name, specialty, subject_template, body_template)
+    VALUES ('delete', old.id, old.name, old.specialty, old.subject_template, old.body_template);
+    INSERT INTO email_templates_fts(rowid, name, specialty, subject_template, body_template)
+    VALUES (new.id, new.name, new.specialty, new.subject_template, new.body_template);
+END""",
+)
+
+
+def _add_email_templates_fts(cursor):
+    """Migration 7: build the email_templates full-text index from existing rows"""
+    if _table_columns(cursor, 'email_templates'):
+        for statement in EMAIL_TEMPLATES_FTS_DDL:
+            cursor.execute(statement)
+        cursor.execute("INSERT INTO email_templates_fts(email_templates_fts) VALUES ('rebuild')")
+
+
+def _delete_orphaned_email_history(cursor):
+    """Migration 8: delete email_history rows whose quote or vendor is gone,
+    which the delete triggers in SCHEMA_SQL now do as it happens"""
+    if _table_columns(cursor, 'email_history') and _table_columns(cursor, 'vendors') and _table_columns(cursor, 'quotes'):
+        cursor.execute("""
+            DELETE FROM email_history
+            WHERE NOT EXISTS (SELECT 1 FROM quotes WHERE quotes.id = email_history.quote_id)
+               OR NOT EXISTS (SELECT 1 FROM vendors WHERE vendors.id = email_history.vendor_id)
+        """)
+
+
+# Schema migrations as (version, function) pairs, applied in order by init_db
+# when PRAGMA user_version is below the version. Migrations must only alter
+# tables that already exist; new databases get the current schema from the
+# CREATE TABLE statements in SCHEMA_SQL.
+MIGRATIONS = [
+    (1, _upgrade_unversioned_schema),
+    (2, _drop_superseded_indexes),
+    (3, _drop_email_history_fk_indexes),
+    (4, _add_email_history_fts),
+    (5, _denormalize_email_history_names),
+    (6, _drop_email_templates_specialty_index),
+    (7, _add_email_templates_fts),
+    (8, _delete_orphaned_email_history),
+]
+
+# Tables and indexes, created if missing. Runs after MIGRATIONS so indexes
+# can rely on columns that older databases only gain through a migration.
+SCHEMA_SQL = """
+-- Create quotes table
+CREATE TABLE IF NOT EXISTS quotes (
+    id                INTEGER PRIMARY KEY AUTOINCREMENT,
+    customer          TEXT NOT NULL,
+    quote_no          TEXT NOT NULL UNIQUE,
+    description       TEXT,
+    sales_rep         TEXT,
+    project_sheet_url TEXT,
+    mpsf_link         TEXT,
+    folder_link       TEXT,
+    method_link       TEXT,
+    hidden            BOOLEAN DEFAULT 0,
+    created_at        DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at        DATETIME DEFAULT CURRENT_TIMESTAMP,
+    sales_rep_id      INTEGER
+);
+
+-- Create tasks table
+CREATE TABLE IF NOT EXISTS tasks (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    quote_id     INTEGER NOT NULL,
+    label        TEXT NOT NULL,
+    done         BOOLEAN DEFAULT 0,
+    is_separator BOOLEAN DEFAULT 0,
+    FOREIGN KEY(quote_id) REFERENCES quotes(id) ON DELETE CASCADE
+);
+
+-- Create vendor_quotes table
+CREATE TABLE IF NOT EXISTS vendor_quotes (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    quote_id   INTEGER NOT NULL,
+    type       TEXT CHECK(type IN ('freight','install','forward')) NOT NULL,
+    vendor     TEXT NOT NULL,
+    requested  BOOLEAN DEFAULT 0,
+    entered    BOOLEAN DEFAULT 0,
+    status     TEXT DEFAULT 'draft',
+    notes      TEXT,
+    date       DATE,
+    FOREIGN KEY(quote_id) REFERENCES quotes(id) ON DELETE CASCADE
+);
+
+-- Create notes table
+CREATE TABLE IF NOT EXISTS notes (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    quote_id   INTEGER NOT NULL,
+    content    TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY(quote_id) REFERENCES quotes(id) ON DELETE CASCADE
+);
+
+-- Create events table
+CREATE TABLE IF NOT EXISTS events (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    quote_id   INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    past        TEXT,
+    present     TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY(quote_id) REFERENCES quotes(id) ON DELETE CASCADE
+);
+
+-- Create vendors table
+CREATE TABLE IF NOT EXISTS vendors (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    contact_name TEXT,
+    email TEXT,
+    phone TEXT,
+    specialization TEXT,
+    is_active BOOLEAN DEFAULT 1,
+    notes TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create sales_reps table
+CREATE TABLE IF NOT EXISTS sales_reps (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    email TEXT UNIQUE,
+    phone TEXT,
+    is_active BOOLEAN DEFAULT 1,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create email_history table
+CREATE TABLE IF NOT EXISTS email_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    quote_id INTEGER NOT NULL,
+    vendor_quote_id INTEGER NOT NULL,
+    vendor_id INTEGER NOT NULL,
+    to_email TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    template_id INTEGER,
+    sent_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    status TEXT DEFAULT 'sent',
+    gas_response TEXT NULL,
+    email_status TEXT DEFAULT 'current',
+    cc_emails TEXT DEFAULT '[]',
+    bcc_emails TEXT DEFAULT '[]',
+    vendor_name TEXT,
+    quote_no TEXT,
+    FOREIGN KEY(quote_id) REFERENCES quotes(id),
+    FOREIGN KEY(vendor_quote_id) REFERENCES vendor_quotes(id),
+    FOREIGN KEY(vendor_id) REFERENCES vendors(id),
+    FOREIGN KEY(template_id) REFERENCES email_templates(id)
+);
+
+-- Create specialty-based email_templates table
+CREATE TABLE IF NOT EXISTS email_templates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    specialty TEXT NOT NULL CHECK(specialty IN ('freight', 'install', 'forward', 'general')),
+    subject_template TEXT NOT NULL,
+    body_template TEXT NOT NULL,
+    is_default BOOLEAN DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create indexes for email tables
+-- Serves the per-specialty template listings in their display order and the
+-- default-template lookups
+CREATE INDEX IF NOT EXISTS idx_email_templates_specialty_default ON email_templates(specialty, is_default DESC, name);
+CREATE INDEX IF NOT EXISTS idx_email_templates_is_default ON email_templates(is_default);
+CREATE INDEX IF NOT EXISTS idx_email_history_quote_sent ON email_history(quote_id, sent_at DESC);
+CREATE INDEX IF NOT EXISTS idx_email_history_vendor_sent ON email_history(vendor_id, sent_at DESC);
+CREATE INDEX IF NOT EXISTS idx_email_history_vendor_quote_sent ON email_history(vendor_quote_id, sent_at DESC);
+CREATE INDEX IF NOT EXISTS idx_email_history_sent_at_id ON email_history(sent_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_email_history_email_status ON email_history(email_status);
+
+-- Per-quote event timeline, newest first
+CREATE INDEX IF NOT EXISTS idx_events_quote_created ON events(quote_id, created_at DESC);
+
+-- Covers the per-quote vendor quote listing (ordered by type) and the
+-- status counts in the quote list
+CREATE INDEX IF NOT EXISTS idx_vendor_quotes_quote_type_status ON vendor_quotes(quote_id, type, status);
+
+-- Create indexes for sales_reps table
+CREATE INDEX IF NOT EXISTS idx_sales_reps_name ON sales_reps(name);
+CREATE INDEX IF NOT EXISTS idx_sales_reps_email ON sales_reps(email);
+CREATE INDEX IF NOT EXISTS idx_sales_reps_active ON sales_reps(is_active);
+
+-- Create default_tasks table
+CREATE TABLE IF NOT EXISTS default_tasks (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    label        TEXT NOT NULL,
+    sort_order   INTEGER DEFAULT 0,
+    is_separator BOOLEAN DEFAULT 0,
+    created_at   DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Keep the vendor name and quote number copied onto email_history current
+CREATE TRIGGER IF NOT EXISTS email_history_vendor_rename AFTER UPDATE OF name ON vendors
+WHEN new.name IS NOT old.name BEGIN
+    UPDATE email_history SET vendor_name = new.name WHERE vendor_id = new.id;
+END;
+CREATE TRIGGER IF NOT EXISTS email_history_quote_renumber AFTER UPDATE OF quote_no ON quotes
+WHEN new.quote_no IS NOT old.quote_no BEGIN
+    UPDATE email_history SET quote_no = new.quote_no WHERE quote_id = new.id;
+END;
+
+-- Drop email_history rows along with their quote or vendor
+CREATE TRIGGER IF NOT EXISTS email_history_quote_delete AFTER DELETE ON quotes BEGIN
+    DELETE FROM email_history WHERE quote_id = old.id;
+END;
+CREATE TRIGGER IF NOT EXISTS email_history_vendor_delete AFTER DELETE ON vendors BEGIN
+    DELETE FROM email_history WHERE vendor_id = old.id;
+END;
+
+-- Create email_history full-text index
+""" + "".join(f"{statement};\n" for statement in EMAIL_HISTORY_FTS_DDL + EMAIL_TEMPLATES_FTS_DDL)
+
+# Default specialty templates, seeded only into an empty email_templates table
+_TEMPLATE_COLUMNS = ('name', 'specialty', 'is_default', 'subject_template', 'body_template')
+_DEFAULT_TEMPLATES = (
+    ('General Quote Request', 'general', True,
+     "Quote Request - {customer} - {quote_no}",
+     '''Dear {contact_name},
 
 We are requesting a quote for {customer} for the following project:
 
@@ -264,9 +416,9 @@ Best regards,
 {sales_rep}
 {current_date}'''),
 
-                        ('Freight Quote Request', 'freight', True,
-                         "Freight Quote Request - {customer} - {quote_no}",
-                         '''Dear {contact_name},
+    ('Freight Quote Request', 'freight', True,
+     "Freight Quote Request - {customer} - {quote_no}",
+     '''Dear {contact_name},
 
 We are requesting a freight quote for {customer} for the following project:
 
@@ -288,9 +440,9 @@ Best regards,
 {sales_rep}
 {current_date}'''),
 
-                        ('Installation Quote Request', 'install', True,
-                         "Installation Quote Request - {customer} - {quote_no}",
-                         '''Dear {contact_name},
+    ('Installation Quote Request', 'install', True,
+     "Installation Quote Request - {customer} - {quote_no}",
+     '''Dear {contact_name},
 
 We are requesting an installation quote for {customer} for the following project:
 
@@ -312,9 +464,9 @@ Best regards,
 {sales_rep}
 {current_date}'''),
 
-                        ('Forwarding Quote Request', 'forward', True,
-                         "Forwarding Quote Request - {customer} - {quote_no}",
-                         '''Dear {contact_name},
+    ('Forwarding Quote Request', 'forward', True,
+     "Forwarding Quote Request - {customer} - {quote_no}",
+     '''Dear {contact_name},
 
 We are requesting a forwarding/consolidation quote for {customer} for the following project:
 
@@ -335,51 +487,118 @@ Thank you for your consideration.
 Best regards,
 {sales_rep}
 {current_date}''')
-                    ]
+)
 
-                    cursor.executemany('''
-                    INSERT INTO email_templates (name, specialty, is_default, subject_template, body_template)
-                    VALUES (?, ?, ?, ?, ?)
-                    ''', default_templates)
-                    print("Default specialty email templates created.")
+# Default task list, seeded only into an empty default_tasks table
+_TASK_COLUMNS = ('id', 'label', 'sort_order', 'is_separator')
+_DEFAULT_TASKS = (
+    (1, "Create purchase order", 0, 0),
+    (2, "Send quote to customer", 10, 0),
+    (3, "Follow up with customer", 20, 0),
+    (4, "Request freight quote", 30, 0),
+    (5, "Request installation quote", 40, 0),
+    (6, "Finalize pricing", 50, 0),
+    (7, "Internal approvals", 60, 1),  # Separator
+    (8, "Get manager approval", 70, 0),
+    (9, "Submit to accounting", 80, 0),
+)
+
+
+def _sql_literal(value):
+    """Render a seed value as an SQL literal"""
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(int(value))
+
+
+def _seed_sql(table, columns, rows):
+    """Render one INSERT that adds all seed rows only if the table is empty.
+
+    The seed values are constants, so they are written into the statement as
+    literals once at import rather than bound as parameters on every run.
+    """
+    values = ',\n'.join('(' + ', '.join(_sql_literal(v) for v in row) + ')'
+                        for row in rows)
+    return (f"INSERT INTO {table} ({', '.join(columns)})\n"
+            f"SELECT * FROM (VALUES {values})\n"
+            f"WHERE NOT EXISTS (SELECT 1 FROM {table})")
+
+
+_SEED_TEMPLATES_SQL = _seed_sql('email_templates', _TEMPLATE_COLUMNS, _DEFAULT_TEMPLATES)
+_SEED_TASKS_SQL = _seed_sql('default_tasks', _TASK_COLUMNS, _DEFAULT_TASKS)
 
-                # Create default_tasks table
-                cursor.execute('''
-                CREATE TABLE IF NOT EXISTS default_tasks (
-                    id           INTEGER PRIMARY KEY AUTOINCREMENT,
-                    label        TEXT NOT NULL,
-                    sort_order   INTEGER DEFAULT 0,
-                    is_separator BOOLEAN DEFAULT 0,
-                    created_at   DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-                ''')
-
-                # Enable foreign key constraints
+
+class DatabaseManager:
+    # Set once init_db has completed so repeat calls in a process are no-ops
+    _initialized = False
+
+    @staticmethod
+    def get_connection():
+        """Create a database connection and return it"""
+        try:
+            # Pooled connections are handed between request threads
+            conn = sqlite3.connect(DATABASE_PATH, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+            conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            return conn
+        except Error as e:
+            print(f"Database connection error: {e}")
+            return None
+
+    @staticmethod
+    def init_db():
+        """Initialize the database with tables if they don't exist"""
+        if DatabaseManager._initialized:
+            return
+        connection = DatabaseManager.get_connection()
+        if connection:
+            # Transactions are managed explicitly below so the whole
+            # initializer commits once instead of per statement
+            connection.isolation_level = None
+            cursor = connection.cursor()
+            try:
+                # Write-ahead logging lets readers run alongside a writer; the
+                # setting is stored in the database file and persists
+                cursor.execute("PRAGMA journal_mode = WAL")
+
+                # Enable foreign key constraints (cannot change mid-transaction)
                 cursor.execute("PRAGMA foreign_keys = ON")
-                
+
+                # Bring existing tables up to date before creating missing ones
+                cursor.execute("PRAGMA user_version")
+                schema_version = cursor.fetchone()[0]
+                pending = [m for m in MIGRATIONS if m[0] > schema_version]
+                if pending:
+                    cursor.execute("BEGIN IMMEDIATE")
+                    for version, migrate in pending:
+                        migrate(cursor)
+                        cursor.execute(f"PRAGMA user_version = {version}")
+
+                # executescript commits the migrations above first, then opens
+                # the transaction that covers the schema and seed data
+                connection.executescript("BEGIN IMMEDIATE;\n" + SCHEMA_SQL)
+
+                # Seed default specialty templates into an empty table
+                cursor.execute(_SEED_TEMPLATES_SQL)
+                if cursor.rowcount > 0:
+                    print("Default specialty email templates created.")
+
                 # Add some default tasks if the table is empty
-                cursor.execute("SELECT COUNT(*) FROM default_tasks")
-                if cursor.fetchone()[0] == 0:
-                    default_tasks = [
-                        (1, "Create purchase order", 0, 0),
-                        (2, "Send quote to customer", 10, 0),
-                        (3, "Follow up with customer", 20, 0),
-                        (4, "Request freight quote", 30, 0),
-                        (5, "Request installation quote", 40, 0),
-                        (6, "Finalize pricing", 50, 0),
-                        (7, "Internal approvals", 60, 1),  # Separator
-                        (8, "Get manager approval", 70, 0),
-                        (9, "Submit to accounting", 80, 0)
-                    ]
-                    
-                    cursor.executemany('''
-                    INSERT OR IGNORE INTO default_tasks (id, label, sort_order, is_separator)
-                    VALUES (?, ?, ?, ?)
-                    ''', default_tasks)
-                
-                connection.commit()
+                cursor.execute(_SEED_TASKS_SQL)
+
+                # Refresh planner statistics after a schema upgrade so new
+                # indexes are picked up
+                if pending:
+                    cursor.execute("ANALYZE")
+
+                cursor.execute("COMMIT")
+                DatabaseManager._initialized = True
                 print("Database initialized successfully")
             except Error as e:
+                if connection.in_transaction:
+                    cursor.execute("ROLLBACK")
                 print(f"Database initialization error: {e}")
             finally:
                 connection.close()
@@ -387,13 +606,63 @@ Best regards,
             print("Could not establish database connection")
 
 
+class ConnectionPool:
+    """Keeps configured connections open so their page and statement caches
+    survive between requests instead of being rebuilt on every connect"""
+
+    def __init__(self, size):
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._releases = itertools.count(1)
+
+    def acquire(self):
+        """Return an idle connection, opening a new one if none are free"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return DatabaseManager.get_connection()
+
+    def release(self, conn):
+        """Return a connection to the pool, closing it if the pool is full"""
+        # Uncommitted work is discarded, the same as closing the connection did
+        if conn.in_transaction:
+            conn.rollback()
+        if next(self._releases) % OPTIMIZE_INTERVAL == 0:
+            self._optimize(conn)
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._optimize(conn)
+            conn.close()
+
+    @staticmethod
+    def _optimize(conn):
+        """Let SQLite refresh planner statistics for the tables this
+        connection has queried; skipped if the database is busy"""
+        try:
+            conn.execute("PRAGMA optimize")
+        except Error as e:
+            print(f"PRAGMA optimize skipped: {e}")
+
+
+connection_pool = ConnectionPool(POOL_SIZE)
+
+
 class DatabaseContext:
-    """Context manager for database connections"""
-    
+    """Context manager for database connections.
+
+    Rows come back as sqlite3.Row by default; pass row_factory=None to get
+    plain tuples on loops that only need positional access.
+    """
+
+    def __init__(self, row_factory=sqlite3.Row):
+        self.row_factory = row_factory
+
     def __enter__(self):
-        self.conn = DatabaseManager.get_connection()
+        self.conn = connection_pool.acquire()
+        if self.conn:
+            self.conn.row_factory = self.row_factory
         return self.conn
         
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.conn:
-            self.conn.close()
+            connection_pool.release(self.conn)
@@ -1,10 +1,39 @@
-from app.models.quote import Quote
-from app.models.vendor import Vendor
-from app.models.vendor_quote import VendorQuote
-from app.models.note import Note
-from app.models.event import Event
-from app.models.email_template import EmailTemplate
-from app.models.email_history import EmailHistory
-from app.models.sales_rep import SalesRep
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.models.quote import Quote
+    from app.models.vendor import Vendor
+    from app.models.vendor_quote import VendorQuote
+    from app.models.note import Note
+    from app.models.event import Event
+    from app.models.email_template import EmailTemplate
+    from app.models.email_history import EmailHistory
+    from app.models.sales_rep import SalesRep
+
+# Model modules are imported on first attribute access (PEP 562) so that
+# importing one model does not load all of them
+_MODULES = {
+    'Quote': '.quote',
+    'Vendor': '.vendor',
+    'VendorQuote': '.vendor_quote',
+    'Note': '.note',
+    'Event': '.event',
+    'EmailTemplate': '.email_template',
+    'EmailHistory': '.email_history',
+    'SalesRep': '.sales_rep',
+}
 
 __all__ = ['Quote', 'Vendor', 'VendorQuote', 'Note', 'Event', 'EmailTemplate', 'EmailHistory', 'SalesRep']
+
+
+def __getattr__(name):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_MODULES[name], __name__), name)
+    globals()[name] = value  # Cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,11 +1,102 @@
 from app.db import DatabaseContext
+from app.utils.cache import TTLCache
 from datetime import datetime
-import json
+from functools import lru_cache
 import logging
+import orjson
 
 # Set up logging for email history operations
 logger = logging.getLogger(__name__)
 
+# Records per multi-row INSERT in create_many; 14 parameters per record keeps
+# each statement under SQLite's default limit of 999 bound parameters
+CREATE_MANY_CHUNK_SIZE = 70
+
+# Records removed per transaction by delete_old_records
+DELETE_CHUNK_SIZE = 1000
+
+# Total record count. Writes in this process invalidate it; the TTL bounds
+# staleness from other workers.
+_count_cache = TTLCache(maxsize=1, ttl=5)
+
+# Shared pieces of the email history reads. List views leave out the body;
+# the per-quote view adds CC/BCC and the single-record view adds both.
+_LIST_COLUMNS = '''eh.id, eh.quote_id, eh.vendor_quote_id, eh.vendor_id,
+       eh.to_email, eh.subject, eh.template_id,
+       eh.sent_at, eh.status, eh.gas_response, eh.email_status,
+       eh.vendor_name, eh.quote_no'''
+_CC_COLUMNS = _LIST_COLUMNS + ', eh.cc_emails, eh.bcc_emails'
+_DETAIL_COLUMNS = _CC_COLUMNS + ', eh.body'
+# Metadata only: body and gas_response are the widest columns
+_META_COLUMNS = '''eh.id, eh.quote_id, eh.vendor_quote_id, eh.vendor_id,
+       eh.to_email, eh.subject, eh.template_id,
+       eh.sent_at, eh.status, eh.email_status,
+       eh.vendor_name, eh.quote_no, eh.cc_emails, eh.bcc_emails'''
+_FROM = 'FROM email_history eh'
+
+_INSERT_COLUMNS = '''(quote_id, vendor_quote_id, vendor_id, to_email, subject, body,
+ template_id, status, gas_response, email_status, cc_emails, bcc_emails,
+ vendor_name, quote_no)'''
+# The vendor name and quote number are copied from their tables at insert time
+_INSERT_ROW = '''(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+ (SELECT name FROM vendors WHERE id = ?), (SELECT quote_no FROM quotes WHERE id = ?))'''
+_SQL_INSERT = f"INSERT INTO email_history {_INSERT_COLUMNS} VALUES {_INSERT_ROW} RETURNING id, sent_at"
+
+# One set of matching IDs, so email_history rows are fetched by rowid rather
+# than scanned and tested against each condition
+_SEARCH_WHERE = '''
+    eh.id IN (SELECT rowid FROM email_history_fts WHERE subject LIKE ?
+              UNION
+              SELECT rowid FROM email_history_fts WHERE to_email LIKE ?
+              UNION
+              SELECT id FROM email_history
+              WHERE vendor_id IN (SELECT id FROM vendors WHERE name LIKE ?)
+              UNION
+              SELECT id FROM email_history
+              WHERE quote_id IN (SELECT id FROM quotes WHERE quote_no LIKE ?))
+'''
+
+# An empty gas_response keeps the stored one
+_SQL_UPDATE_STATUS = "UPDATE email_history SET status = ?, gas_response = COALESCE(?, gas_response) WHERE id = ?"
+
+
+def _json_dumps(value, default=None):
+    """Serialize value to JSON text with orjson"""
+    return orjson.dumps(value, default=default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _gas_response_json(gas_response):
+    """Store structured GAS responses as JSON text; plain strings as given"""
+    if gas_response is None or isinstance(gas_response, str):
+        return gas_response
+    return _json_dumps(gas_response, default=str)
+
+
+# SQL assembled from fragments is built once per shape and reused rather than
+# re-formatted on every call; the connection's statement cache then keeps the
+# prepared statement for each shape
+
+@lru_cache(maxsize=None)
+def _insert_many_sql(row_count):
+    """Multi-row INSERT for row_count records, returning their IDs"""
+    values = ', '.join([_INSERT_ROW] * row_count)
+    return f"INSERT INTO email_history {_INSERT_COLUMNS} VALUES {values} RETURNING id"
+
+
+@lru_cache(maxsize=64)
+def _select_sql(where_sql, columns, order, with_limit, with_offset):
+    """Email history SELECT for one read shape"""
+    sql = f"SELECT {columns} {_FROM}"
+    if where_sql:
+        sql += f" WHERE {where_sql}"
+    sql += f" ORDER BY {order}"
+    if with_limit:
+        sql += " LIMIT ?"
+        if with_offset:
+            sql += " OFFSET ?"
+    return sql
+
+
 class EmailHistory:
     def __init__(self, id=None, quote_id=None, vendor_quote_id=None, vendor_id=None,
                  to_email=None, subject=None, body=None, template_id=None, sent_at=None,
@@ -25,329 +116,234 @@ class EmailHistory:
         self.cc_emails = cc_emails or []
         self.bcc_emails = bcc_emails or []
 
+    @staticmethod
+    def _parse_email_array(emails_json):
+        """Parse one stored CC/BCC JSON array, treating bad values as empty"""
+        # Most emails have no CC/BCC, stored as '[]'; skip the parser for those
+        if not emails_json or emails_json == '[]':
+            return []
+        try:
+            return orjson.loads(emails_json)
+        except (orjson.JSONDecodeError, TypeError):
+            return []
+
     @staticmethod
     def _parse_cc_bcc_arrays(cc_emails_json, bcc_emails_json):
         """Parse CC/BCC JSON arrays from database with error handling"""
-        try:
-            cc_emails = json.loads(cc_emails_json) if cc_emails_json else []
-        except (json.JSONDecodeError, TypeError):
-            cc_emails = []
+        return (EmailHistory._parse_email_array(cc_emails_json),
+                EmailHistory._parse_email_array(bcc_emails_json))
 
-        try:
-            bcc_emails = json.loads(bcc_emails_json) if bcc_emails_json else []
-        except (json.JSONDecodeError, TypeError):
-            bcc_emails = []
+    @staticmethod
+    def _insert_values(quote_id, vendor_quote_id, vendor_id, to_email, subject, body,
+                       template_id=None, status='sent', gas_response=None, email_status='current',
+                       cc_emails=None, bcc_emails=None):
+        """Build the email_history column values for one new record"""
+        gas_response_json = _gas_response_json(gas_response)
+
+        # Convert CC/BCC arrays to JSON strings
+        cc_emails_json = _json_dumps(cc_emails or [])
+        bcc_emails_json = _json_dumps(bcc_emails or [])
 
-        return cc_emails, bcc_emails
+        return (quote_id, vendor_quote_id, vendor_id, to_email, subject, body,
+                template_id, status, gas_response_json, email_status, cc_emails_json, bcc_emails_json,
+                vendor_id, quote_id)
 
     @staticmethod
     def create(quote_id, vendor_quote_id, vendor_id, to_email, subject, body,
-                template_id=None, status='sent', gas_response=None, email_status='current', cc_emails=None, bcc_emails=None):
-        """Create a new email history record"""
-        try:
-            # Convert gas_response to JSON string if it's a dict
-            gas_response_json = json.dumps(gas_response) if isinstance(gas_response, dict) else gas_response
+                template_id=None, status='sent', gas_response=None, email_status='current', cc_emails=None, bcc_emails=None,
+                with_sent_at=False):
+        """Create a new email history record.
 
-            # Convert CC/BCC arrays to JSON strings
-            cc_emails_json = json.dumps(cc_emails or [])
-            bcc_emails_json = json.dumps(bcc_emails or [])
+        Returns the new record ID, or (id, sent_at) when with_sent_at is set so
+        callers don't need to re-read the row for its timestamp.
+        """
+        try:
+            values = EmailHistory._insert_values(
+                quote_id, vendor_quote_id, vendor_id, to_email, subject, body,
+                template_id, status, gas_response, email_status, cc_emails, bcc_emails)
 
             with DatabaseContext() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO email_history
-                    (quote_id, vendor_quote_id, vendor_id, to_email, subject, body,
-                     template_id, status, gas_response, email_status, cc_emails, bcc_emails)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (quote_id, vendor_quote_id, vendor_id, to_email, subject, body,
-                      template_id, status, gas_response_json, email_status, cc_emails_json, bcc_emails_json))
-
-                history_id = cursor.lastrowid
+                cursor.execute(_SQL_INSERT, values)
+
+                history_id, sent_at = cursor.fetchone()
                 conn.commit()
+                _count_cache.clear()
 
-                logger.info(f"Email history created: ID={history_id}, Quote={quote_id}, Vendor={vendor_id}, To={to_email}")
+                logger.info("Email history created: ID=%s, Quote=%s, Vendor=%s, To=%s",
+                            history_id, quote_id, vendor_id, to_email)
                 if cc_emails:
-                    logger.info(f"CC recipients: {cc_emails}")
+                    logger.info("CC recipients: %s", cc_emails)
                 if bcc_emails:
-                    logger.info(f"BCC recipients: {bcc_emails}")
+                    logger.info("BCC recipients: %s", bcc_emails)
+                if with_sent_at:
+                    return history_id, sent_at
                 return history_id
 
         except Exception as e:
-            logger.error(f"Failed to create email history: {str(e)}")
+            logger.error("Failed to create email history: %s", e)
+            raise Exception(f"Database error while creating email history: {str(e)}")
+
+    @staticmethod
+    def create_many(records):
+        """Create several email history records in one transaction.
+
+        Each record is a dict of EmailHistory.create keyword arguments. Rows
+        are written with multi-row INSERTs of up to CREATE_MANY_CHUNK_SIZE
+        records each. Returns the new record IDs in input order.
+        """
+        rows = [EmailHistory._insert_values(**record) for record in records]
+        if not rows:
+            return []
+
+        try:
+            history_ids = []
+            with DatabaseContext(row_factory=None) as conn:
+                cursor = conn.cursor()
+                for start in range(0, len(rows), CREATE_MANY_CHUNK_SIZE):
+                    chunk = rows[start:start + CREATE_MANY_CHUNK_SIZE]
+                    cursor.execute(_insert_many_sql(len(chunk)),
+                                   [value for row in chunk for value in row])
+                    # RETURNING order is unspecified; new IDs ascend in insert order
+                    history_ids.extend(sorted(row[0] for row in cursor.fetchall()))
+                conn.commit()
+                _count_cache.clear()
+
+            logger.info("Email history created: %s records", len(history_ids))
+            return history_ids
+
+        except Exception as e:
+            logger.error("Failed to create email history batch: %s", e)
             raise Exception(f"Database error while creating email history: {str(e)}")
 
+    @staticmethod
+    def _iter_fetch(where_sql=None, params=(), columns=None, order='eh.sent_at DESC',
+                    limit=None, offset=None):
+        """Run an email history SELECT and yield the rows as dicts.
+
+        Call sites pass constant fragments, so each one maps to a single
+        cached SQL string and keeps its prepared statement warm. The pooled
+        connection stays checked out until the generator is exhausted or
+        closed.
+        """
+        sql = _select_sql(where_sql, columns or _LIST_COLUMNS, order,
+                          limit is not None, limit is not None and offset is not None)
+        if limit is not None:
+            params = (*params, limit)
+            if offset is not None:
+                params = (*params, offset)
+
+        # Plain tuples zipped against the column names once per query are
+        # cheaper than building and then copying a sqlite3.Row per record
+        with DatabaseContext(row_factory=None) as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            names = [column[0] for column in cursor.description]
+            with_cc = 'cc_emails' in names
+
+            for row in cursor:
+                history = dict(zip(names, row))
+                if with_cc:
+                    # Parse CC/BCC JSON arrays
+                    history['cc_emails'], history['bcc_emails'] = EmailHistory._parse_cc_bcc_arrays(
+                        history['cc_emails'], history['bcc_emails'])
+                yield history
+
+    @staticmethod
+    def _fetch(*args, **kwargs):
+        """Run an email history SELECT and return the rows as a list"""
+        return list(EmailHistory._iter_fetch(*args, **kwargs))
+
     @staticmethod
     def get_by_id(history_id):
         """Get an email history record by ID"""
-        with DatabaseContext() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT eh.id, eh.quote_id, eh.vendor_quote_id, eh.vendor_id,
-                       eh.to_email, eh.subject, eh.body, eh.template_id,
-                       eh.sent_at, eh.status, eh.gas_response, eh.email_status,
-                       eh.cc_emails, eh.bcc_emails,
-                       v.name as vendor_name, q.quote_no
-                FROM email_history eh
-                JOIN vendors v ON eh.vendor_id = v.id
-                JOIN quotes q ON eh.quote_id = q.id
-                WHERE eh.id = ?
-            ''', (history_id,))
-
-            row = cursor.fetchone()
-            if row:
-                # Parse CC/BCC JSON arrays
-                cc_emails, bcc_emails = EmailHistory._parse_cc_bcc_arrays(row['cc_emails'], row['bcc_emails'])
-
-                return {
-                    'id': row['id'],
-                    'quote_id': row['quote_id'],
-                    'vendor_quote_id': row['vendor_quote_id'],
-                    'vendor_id': row['vendor_id'],
-                    'to_email': row['to_email'],
-                    'subject': row['subject'],
-                    'body': row['body'],
-                    'template_id': row['template_id'],
-                    'sent_at': row['sent_at'],
-                    'status': row['status'],
-                    'gas_response': row['gas_response'],
-                    'email_status': row['email_status'],
-                    'cc_emails': cc_emails,
-                    'bcc_emails': bcc_emails,
-                    'vendor_name': row['vendor_name'],
-                    'quote_no': row['quote_no']
-                }
-            return None
+        rows = EmailHistory._fetch('eh.id = ?', (history_id,), columns=_DETAIL_COLUMNS, order='eh.id')
+        return rows[0] if rows else None
+
+    @staticmethod
+    def get_meta_by_id(history_id):
+        """Get an email history record by ID without its body or gas_response"""
+        rows = EmailHistory._fetch('eh.id = ?', (history_id,), columns=_META_COLUMNS, order='eh.id')
+        return rows[0] if rows else None
 
     @staticmethod
     def get_by_quote(quote_id):
         """Get all email history for a specific quote"""
-        with DatabaseContext() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT eh.id, eh.vendor_quote_id, eh.vendor_id,
-                       eh.to_email, eh.subject, eh.template_id,
-                       eh.sent_at, eh.status, eh.gas_response, eh.email_status,
-                       eh.cc_emails, eh.bcc_emails,
-                       v.name as vendor_name, q.quote_no
-                FROM email_history eh
-                JOIN vendors v ON eh.vendor_id = v.id
-                JOIN quotes q ON eh.quote_id = q.id
-                WHERE eh.quote_id = ?
-                ORDER BY eh.sent_at DESC
-            ''', (quote_id,))
-
-            rows = cursor.fetchall()
-            history_list = []
-
-            for row in rows:
-                # Parse CC/BCC JSON arrays
-                cc_emails, bcc_emails = EmailHistory._parse_cc_bcc_arrays(row['cc_emails'], row['bcc_emails'])
-
-                history = {
-                    'id': row['id'],
-                    'vendor_quote_id': row['vendor_quote_id'],
-                    'vendor_id': row['vendor_id'],
-                    'to_email': row['to_email'],
-                    'subject': row['subject'],
-                    'template_id': row['template_id'],
-                    'sent_at': row['sent_at'],
-                    'status': row['status'],
-                    'gas_response': row['gas_response'],
-                    'email_status': row['email_status'],
-                    'cc_emails': cc_emails,
-                    'bcc_emails': bcc_emails,
-                    'vendor_name': row['vendor_name'],
-                    'quote_no': row['quote_no']
-                }
-                history_list.append(history)
-
-            return history_list
+        return EmailHistory._fetch('eh.quote_id = ?', (quote_id,), columns=_CC_COLUMNS)
 
     @staticmethod
     def get_by_vendor(vendor_id):
         """Get all email history for a specific vendor"""
-        with DatabaseContext() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT eh.id, eh.quote_id, eh.vendor_quote_id,
-                       eh.to_email, eh.subject, eh.template_id,
-                       eh.sent_at, eh.status, eh.gas_response, eh.email_status,
-                       v.name as vendor_name, q.quote_no
-                FROM email_history eh
-                JOIN vendors v ON eh.vendor_id = v.id
-                JOIN quotes q ON eh.quote_id = q.id
-                WHERE eh.vendor_id = ?
-                ORDER BY eh.sent_at DESC
-            ''', (vendor_id,))
-
-            rows = cursor.fetchall()
-            history_list = []
-
-            for row in rows:
-                history = {
-                    'id': row['id'],
-                    'quote_id': row['quote_id'],
-                    'vendor_quote_id': row['vendor_quote_id'],
-                    'to_email': row['to_email'],
-                    'subject': row['subject'],
-                    'template_id': row['template_id'],
-                    'sent_at': row['sent_at'],
-                    'status': row['status'],
-                    'gas_response': row['gas_response'],
-                    'email_status': row['email_status'],
-                    'vendor_name': row['vendor_name'],
-                    'quote_no': row['quote_no']
-                }
-                history_list.append(history)
-
-            return history_list
+        return EmailHistory._fetch('eh.vendor_id = ?', (vendor_id,))
 
     @staticmethod
     def get_by_vendor_quote(vendor_quote_id):
         """Get all email history for a specific vendor quote"""
-        with DatabaseContext() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT eh.id, eh.quote_id, eh.vendor_id,
-                       eh.to_email, eh.subject, eh.template_id,
-                       eh.sent_at, eh.status, eh.gas_response, eh.email_status,
-                       v.name as vendor_name, q.quote_no
-                FROM email_history eh
-                JOIN vendors v ON eh.vendor_id = v.id
-                JOIN quotes q ON eh.quote_id = q.id
-                WHERE eh.vendor_quote_id = ?
-                ORDER BY eh.sent_at DESC
-            ''', (vendor_quote_id,))
-
-            rows = cursor.fetchall()
-            history_list = []
-
-            for row in rows:
-                history = {
-                    'id': row['id'],
-                    'quote_id': row['quote_id'],
-                    'vendor_id': row['vendor_id'],
-                    'to_email': row['to_email'],
-                    'subject': row['subject'],
-                    'template_id': row['template_id'],
-                    'sent_at': row['sent_at'],
-                    'status': row['status'],
-                    'gas_response': row['gas_response'],
-                    'email_status': row['email_status'],
-                    'vendor_name': row['vendor_name'],
-                    'quote_no': row['quote_no']
-                }
-                history_list.append(history)
-
-            return history_list
+        return EmailHistory._fetch('eh.vendor_quote_id = ?', (vendor_quote_id,))
 
     @staticmethod
-    def get_all(limit=100, offset=0):
-        """Get all email history with pagination"""
-        with DatabaseContext() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT eh.id, eh.quote_id, eh.vendor_quote_id, eh.vendor_id,
-                       eh.to_email, eh.subject, eh.template_id,
-                       eh.sent_at, eh.status, eh.gas_response, eh.email_status,
-                       eh.cc_emails, eh.bcc_emails,
-                       v.name as vendor_name, q.quote_no
-                FROM email_history eh
-                JOIN vendors v ON eh.vendor_id = v.id
-                JOIN quotes q ON eh.quote_id = q.id
-                ORDER BY eh.sent_at DESC
-                LIMIT ? OFFSET ?
-            ''', (limit, offset))
-
-            rows = cursor.fetchall()
-            history_list = []
-
-            for row in rows:
-                history = {
-                    'id': row['id'],
-                    'quote_id': row['quote_id'],
-                    'vendor_quote_id': row['vendor_quote_id'],
-                    'vendor_id': row['vendor_id'],
-                    'to_email': row['to_email'],
-                    'subject': row['subject'],
-                    'template_id': row['template_id'],
-                    'sent_at': row['sent_at'],
-                    'status': row['status'],
-                    'gas_response': row['gas_response'],
-                    'email_status': row['email_status'],
-                    'vendor_name': row['vendor_name'],
-                    'quote_no': row['quote_no']
-                }
-                history_list.append(history)
-
-            return history_list
+    def iter_all(limit=100, offset=0, after_sent_at=None, after_id=None):
+        """Yield email history records page by page as they are read.
+
+        Pass the sent_at and id of the last record seen as after_sent_at and
+        after_id to read the next page by keyset, which costs the same at any
+        depth. offset is still honoured when no keyset is given.
+        """
+        if after_sent_at is not None and after_id is not None:
+            return EmailHistory._iter_fetch('(eh.sent_at, eh.id) < (?, ?)', (after_sent_at, after_id),
+                                            order='eh.sent_at DESC, eh.id DESC', limit=limit)
+        return EmailHistory._iter_fetch(order='eh.sent_at DESC, eh.id DESC', limit=limit, offset=offset)
 
     @staticmethod
-    def search(query, limit=100, offset=0):
-        """Search email history by subject, vendor name, or quote number"""
-        with DatabaseContext() as conn:
-            cursor = conn.cursor()
-            search_pattern = f'%{query}%'
-            cursor.execute('''
-                SELECT eh.id, eh.quote_id, eh.vendor_quote_id, eh.vendor_id,
-                       eh.to_email, eh.subject, eh.template_id,
-                       eh.sent_at, eh.status, eh.gas_response, eh.email_status,
-                       v.name as vendor_name, q.quote_no
-                FROM email_history eh
-                JOIN vendors v ON eh.vendor_id = v.id
-                JOIN quotes q ON eh.quote_id = q.id
-                WHERE eh.subject LIKE ?
-                   OR v.name LIKE ?
-                   OR q.quote_no LIKE ?
-                   OR eh.to_email LIKE ?
-                ORDER BY eh.sent_at DESC
-                LIMIT ? OFFSET ?
-            ''', (search_pattern, search_pattern, search_pattern, search_pattern, limit, offset))
-
-            rows = cursor.fetchall()
-            history_list = []
-
-            for row in rows:
-                history = {
-                    'id': row['id'],
-                    'quote_id': row['quote_id'],
-                    'vendor_quote_id': row['vendor_quote_id'],
-                    'vendor_id': row['vendor_id'],
-                    'to_email': row['to_email'],
-                    'subject': row['subject'],
-                    'template_id': row['template_id'],
-                    'sent_at': row['sent_at'],
-                    'status': row['status'],
-                    'gas_response': row['gas_response'],
-                    'email_status': row['email_status'],
-                    'vendor_name': row['vendor_name'],
-                    'quote_no': row['quote_no']
-                }
-                history_list.append(history)
-
-            return history_list
+    def get_all(limit=100, offset=0, after_sent_at=None, after_id=None):
+        """Get all email history with pagination; see iter_all"""
+        return list(EmailHistory.iter_all(limit, offset, after_sent_at, after_id))
+
+    @staticmethod
+    def search(query, limit=100, offset=0, after_sent_at=None, after_id=None):
+        """Search email history by subject, recipient, vendor name, or quote number.
+
+        Subject and recipient matches come from the email_history_fts trigram
+        index; vendor and quote matches go through the small vendors and
+        quotes tables and then the vendor and quote indexes. The union of
+        matching IDs is read by rowid and sorted, so email_history is never
+        scanned. Results page by keyset or offset the same way as get_all.
+        """
+        search_pattern = f'%{query}%'
+        params = (search_pattern, search_pattern, search_pattern, search_pattern)
+        if after_sent_at is not None and after_id is not None:
+            return EmailHistory._fetch(f'({_SEARCH_WHERE}) AND (eh.sent_at, eh.id) < (?, ?)',
+                                       (*params, after_sent_at, after_id),
+                                       order='eh.sent_at DESC, eh.id DESC', limit=limit)
+        return EmailHistory._fetch(_SEARCH_WHERE, params, order='eh.sent_at DESC, eh.id DESC',
+                                   limit=limit, offset=offset)
 
     @staticmethod
     def update_status(history_id, status, gas_response=None):
         """Update the status of an email history record"""
         with DatabaseContext() as conn:
             cursor = conn.cursor()
+            cursor.execute(_SQL_UPDATE_STATUS, (status, _gas_response_json(gas_response or None), history_id))
+            conn.commit()
+            return cursor.rowcount > 0
 
-            if gas_response:
-                cursor.execute('''
-                    UPDATE email_history
-                    SET status = ?, gas_response = ?
-                    WHERE id = ?
-                ''', (status, gas_response, history_id))
-            else:
-                cursor.execute('''
-                    UPDATE email_history
-                    SET status = ?
-                    WHERE id = ?
-                ''', (status, history_id))
+    @staticmethod
+    def update_status_many(updates):
+        """Update the status of several email history records in one transaction.
+
+        updates is an iterable of (history_id, status, gas_response) tuples,
+        the arguments of update_status. Returns the number of rows updated.
+        """
+        rows = [(status, _gas_response_json(gas_response or None), history_id)
+                for history_id, status, gas_response in updates]
+        if not rows:
+            return 0
 
+        with DatabaseContext() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(_SQL_UPDATE_STATUS, rows)
             conn.commit()
-            return cursor.rowcount > 0
+            return cursor.rowcount
 
     @staticmethod
     def update_email_status(history_id, email_status):
@@ -365,20 +361,43 @@ class EmailHistory:
     @staticmethod
     def get_count():
         """Get total count of email history records"""
-        with DatabaseContext() as conn:
+        count = _count_cache.get('count')
+        if count is not None:
+            return count
+
+        with DatabaseContext(row_factory=None) as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT COUNT(*) FROM email_history')
-            return cursor.fetchone()[0]
+            count = cursor.fetchone()[0]
+        _count_cache.set('count', count)
+        return count
 
     @staticmethod
     def delete_old_records(days_old=365):
-        """Delete email history records older than specified days (for maintenance)"""
-        with DatabaseContext() as conn:
+        """Delete email history records older than specified days (for maintenance).
+
+        Rows are removed DELETE_CHUNK_SIZE at a time with a commit after each
+        batch, so other writers are only blocked for one batch at a time.
+        """
+        with DatabaseContext(row_factory=None) as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                DELETE FROM email_history
-                WHERE sent_at < datetime('now', '-{} days')
-            '''.format(days_old))
-            deleted_count = cursor.rowcount
-            conn.commit()
-            return deleted_count
\ No newline at end of file
+            # Fix the cutoff once so every batch compares sent_at to a constant
+            cursor.execute("SELECT datetime('now', ?)", (f'-{int(days_old)} days',))
+            cutoff = cursor.fetchone()[0]
+
+            deleted_count = 0
+            while True:
+                cursor.execute('''
+                    DELETE FROM email_history
+                    WHERE id IN (SELECT id FROM email_history
+                                 WHERE sent_at < ?
+                                 LIMIT ?)
+                ''', (cutoff, DELETE_CHUNK_SIZE))
+                conn.commit()
+                deleted_count += cursor.rowcount
+                if cursor.rowcount < DELETE_CHUNK_SIZE:
+                    break
+
+            _count_cache.clear()
+            return deleted_count
+
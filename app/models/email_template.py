@@ -1,7 +1,21 @@
 from app.db import DatabaseContext
+from app.utils.cache import TTLCache
 from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
 import re
 
+# Keys of a template dict, in the column order every SELECT below uses
+_FIELDS = ('id', 'name', 'specialty', 'subject_template', 'body_template',
+           'is_default', 'created_at', 'updated_at')
+
+# Default templates resolved per specialty; cleared by every template write
+_default_cache = TTLCache(maxsize=64, ttl=60)
+
+# Matches {variable} placeholders in subject and body templates
+_PLACEHOLDER_RE = re.compile(r'\{([^}]+)\}')
+
+
 class EmailTemplate:
     def __init__(self, id=None, name=None, specialty=None, subject_template=None, body_template=None,
                  is_default=False, created_at=None, updated_at=None):
@@ -14,6 +28,13 @@ class EmailTemplate:
         self.created_at = created_at
         self.updated_at = updated_at
 
+    @staticmethod
+    def _row_to_dict(row):
+        """Map a selected email_templates row to a template dict"""
+        template = dict(zip(_FIELDS, row))
+        template['is_default'] = bool(template['is_default'])
+        return template
+
     @staticmethod
     def create(name=None, specialty=None, subject_template=None, body_template=None, is_default=False):
         """Create a new email template with specialty-based categorization"""
@@ -31,6 +52,7 @@ class EmailTemplate:
 
             template_id = cursor.lastrowid
             conn.commit()
+            _default_cache.clear()
             return template_id
 
     @staticmethod
@@ -47,16 +69,7 @@ class EmailTemplate:
 
             row = cursor.fetchone()
             if row:
-                return {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'specialty': row['specialty'],
-                    'subject_template': row['subject_template'],
-                    'body_template': row['body_template'],
-                    'is_default': bool(row['is_default']),
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at']
-                }
+                return EmailTemplate._row_to_dict(row)
             return None
 
     @staticmethod
@@ -81,27 +94,15 @@ class EmailTemplate:
                     ORDER BY is_default DESC, name
                 ''', (specialty,))
 
-            rows = cursor.fetchall()
-            templates = []
-
-            for row in rows:
-                template = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'specialty': row['specialty'],
-                    'subject_template': row['subject_template'],
-                    'body_template': row['body_template'],
-                    'is_default': bool(row['is_default']),
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at']
-                }
-                templates.append(template)
-
-            return templates
+            return [EmailTemplate._row_to_dict(row) for row in cursor]
 
     @staticmethod
     def get_default_for_specialty(specialty):
         """Get the default email template for a specific specialty"""
+        cached = _default_cache.get(('specialty', specialty))
+        if cached is not None:
+            return dict(cached)
+
         with DatabaseContext() as conn:
             cursor = conn.cursor()
             cursor.execute('''
@@ -109,38 +110,87 @@ class EmailTemplate:
                        is_default, created_at, updated_at
                 FROM email_templates
                 WHERE specialty = ? AND is_default = 1
+                ORDER BY id
                 LIMIT 1
             ''', (specialty,))
 
             row = cursor.fetchone()
-            if row:
-                return {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'specialty': row['specialty'],
-                    'subject_template': row['subject_template'],
-                    'body_template': row['body_template'],
-                    'is_default': bool(row['is_default']),
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at']
-                }
 
+        if row:
+            template = EmailTemplate._row_to_dict(row)
+        elif specialty != 'general':
             # If no default for this specialty, return general default
-            if specialty != 'general':
-                return EmailTemplate.get_default_for_specialty('general')
-
+            template = EmailTemplate.get_default_for_specialty('general')
+        else:
             return None
 
+        if template:
+            _default_cache.set(('specialty', specialty), template)
+            return dict(template)
+        return None
+
     @staticmethod
     def get_template_for_vendor(vendor_specialization):
         """Get the best template for a vendor based on their specialization"""
-        # Try to get default template for the vendor's specialty first
-        template = EmailTemplate.get_default_for_specialty(vendor_specialization)
-        if template:
-            return template
+        cached = _default_cache.get(('vendor', vendor_specialization))
+        if cached is not None:
+            return dict(cached)
 
-        # Fall back to general template
-        return EmailTemplate.get_default_for_specialty('general')
+        with DatabaseContext() as conn:
+            cursor = conn.cursor()
+            # Default for the vendor's specialty, falling back to the general
+            # default, in one query
+            cursor.execute('''
+                SELECT id, name, specialty, subject_template, body_template,
+                       is_default, created_at, updated_at
+                FROM email_templates
+                WHERE is_default = 1 AND specialty IN (?, 'general')
+                ORDER BY specialty = ? DESC, id
+                LIMIT 1
+            ''', (vendor_specialization, vendor_specialization))
+
+            row = cursor.fetchone()
+            if row:
+                template = EmailTemplate._row_to_dict(row)
+                _default_cache.set(('vendor', vendor_specialization), template)
+                return dict(template)
+            return None
+
+    @staticmethod
+    def get_defaults_for_specialties(specialties):
+        """Get the template get_template_for_vendor would pick for each of
+        several specialties, in one query.
+
+        Returns a dict mapping each specialty to its default template, or to
+        the general default (None if there is none) when it has no default.
+        """
+        specialties = list(dict.fromkeys(specialties))
+        if not specialties:
+            return {}
+
+        with DatabaseContext() as conn:
+            cursor = conn.cursor()
+            placeholders = ', '.join('?' * len(specialties))
+            cursor.execute(f'''
+                SELECT id, name, specialty, subject_template, body_template,
+                       is_default, created_at, updated_at
+                FROM email_templates
+                WHERE is_default = 1 AND specialty IN ({placeholders}, 'general')
+                ORDER BY id
+            ''', specialties)
+
+            # Keep the first default per specialty, as LIMIT 1 would
+            defaults = {}
+            for row in cursor:
+                defaults.setdefault(row['specialty'], EmailTemplate._row_to_dict(row))
+
+        general = defaults.get('general')
+        result = {}
+        for specialty in specialties:
+            template = defaults.get(specialty, general)
+            # Copies, since several specialties can share the general default
+            result[specialty] = dict(template) if template else None
+        return result
 
     @staticmethod
     def get_all():
@@ -154,40 +204,22 @@ class EmailTemplate:
                 ORDER BY specialty, is_default DESC, name
             ''')
 
-            rows = cursor.fetchall()
-            templates = []
-
-            for row in rows:
-                template = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'specialty': row['specialty'],
-                    'subject_template': row['subject_template'],
-                    'body_template': row['body_template'],
-                    'is_default': bool(row['is_default']),
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at']
-                }
-                templates.append(template)
-
-            return templates
+            return [EmailTemplate._row_to_dict(row) for row in cursor]
 
     @staticmethod
     def get_by_specialties():
         """Get all email templates grouped by specialty"""
-        templates = EmailTemplate.get_all()
-        grouped = {}
-
-        for template in templates:
-            if template['specialty'] not in grouped:
-                grouped[template['specialty']] = []
-            grouped[template['specialty']].append(template)
-
-        return grouped
+        # get_all orders by specialty, so each specialty is one consecutive run
+        return {specialty: list(templates)
+                for specialty, templates in groupby(EmailTemplate.get_all(), key=itemgetter('specialty'))}
 
     @staticmethod
     def search(query):
-        """Search email templates by name, specialty, or content"""
+        """Search email templates by name, specialty, or content.
+
+        Matches come from the email_templates_fts trigram index, which answers
+        LIKE '%term%' without scanning the template text.
+        """
         with DatabaseContext() as conn:
             cursor = conn.cursor()
             search_pattern = f'%{query}%'
@@ -195,30 +227,17 @@ class EmailTemplate:
                 SELECT id, name, specialty, subject_template, body_template,
                        is_default, created_at, updated_at
                 FROM email_templates
-                WHERE name LIKE ?
-                   OR specialty LIKE ?
-                   OR subject_template LIKE ?
-                   OR body_template LIKE ?
+                WHERE id IN (SELECT rowid FROM email_templates_fts WHERE name LIKE ?
+                             UNION
+                             SELECT rowid FROM email_templates_fts WHERE specialty LIKE ?
+                             UNION
+                             SELECT rowid FROM email_templates_fts WHERE subject_template LIKE ?
+                             UNION
+                             SELECT rowid FROM email_templates_fts WHERE body_template LIKE ?)
                 ORDER BY specialty, is_default DESC, name
             ''', (search_pattern, search_pattern, search_pattern, search_pattern))
 
-            rows = cursor.fetchall()
-            templates = []
-
-            for row in rows:
-                template = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'specialty': row['specialty'],
-                    'subject_template': row['subject_template'],
-                    'body_template': row['body_template'],
-                    'is_default': bool(row['is_default']),
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at']
-                }
-                templates.append(template)
-
-            return templates
+            return [EmailTemplate._row_to_dict(row) for row in cursor]
 
     @staticmethod
     def update(template_id, name=None, specialty=None, subject_template=None,
@@ -227,12 +246,6 @@ class EmailTemplate:
         with DatabaseContext() as conn:
             cursor = conn.cursor()
 
-            # Get current template to check specialty change
-            cursor.execute("SELECT specialty FROM email_templates WHERE id = ?", (template_id,))
-            current = cursor.fetchone()
-            if not current:
-                return False
-
             # Build update query based on provided parameters
             query_parts = []
             params = []
@@ -254,11 +267,6 @@ class EmailTemplate:
                 params.append(body_template)
 
             if is_default is not None:
-                # If setting as default, unset other defaults for this specialty
-                target_specialty = specialty if specialty is not None else current['specialty']
-                if is_default:
-                    cursor.execute("UPDATE email_templates SET is_default = 0 WHERE specialty = ? AND id != ?",
-                                 (target_specialty, template_id))
                 query_parts.append("is_default = ?")
                 params.append(is_default)
 
@@ -271,8 +279,21 @@ class EmailTemplate:
             params.append(template_id)
 
             cursor.execute(query, params)
+            if cursor.rowcount == 0:
+                return False
+
+            # If setting as default, unset the other defaults in the template's
+            # specialty, read after the update above in case it changed
+            if is_default:
+                cursor.execute('''
+                    UPDATE email_templates SET is_default = 0
+                    WHERE specialty = (SELECT specialty FROM email_templates WHERE id = ?)
+                      AND id != ? AND is_default = 1
+                ''', (template_id, template_id))
+
             conn.commit()
-            return cursor.rowcount > 0
+            _default_cache.clear()
+            return True
 
     @staticmethod
     def set_as_default(template_id):
@@ -280,19 +301,17 @@ class EmailTemplate:
         with DatabaseContext() as conn:
             cursor = conn.cursor()
 
-            # Get the template's specialty
-            cursor.execute("SELECT specialty FROM email_templates WHERE id = ?", (template_id,))
-            template = cursor.fetchone()
-            if not template:
-                return False
-
-            # Unset all other defaults for this specialty
-            cursor.execute("UPDATE email_templates SET is_default = 0 WHERE specialty = ? AND id != ?",
-                         (template['specialty'], template_id))
-
-            # Set this template as default
-            cursor.execute("UPDATE email_templates SET is_default = 1 WHERE id = ?", (template_id,))
+            # Make this template its specialty's only default in one statement;
+            # rows that are neither it nor a current default are left untouched,
+            # and an unknown ID matches nothing
+            cursor.execute('''
+                UPDATE email_templates
+                SET is_default = CASE WHEN id = ? THEN 1 ELSE 0 END
+                WHERE specialty = (SELECT specialty FROM email_templates WHERE id = ?)
+                  AND (is_default = 1 OR id = ?)
+            ''', (template_id, template_id, template_id))
             conn.commit()
+            _default_cache.clear()
             return cursor.rowcount > 0
 
     @staticmethod
@@ -311,6 +330,7 @@ class EmailTemplate:
 
             cursor.execute('DELETE FROM email_templates WHERE id = ?', (template_id,))
             conn.commit()
+            _default_cache.clear()
             return cursor.rowcount > 0
 
     @staticmethod
@@ -342,18 +362,21 @@ class EmailTemplate:
         if not template_content:
             return template_content
 
-        # Find all variables in the template
-        pattern = r'\{([^}]+)\}'
-        matches = re.findall(pattern, template_content)
+        # Substitute every placeholder in one pass; values are not rescanned,
+        # so a value that itself contains {braces} is inserted as-is
+        return _PLACEHOLDER_RE.sub(lambda match: str(variables.get(match.group(1), '')), template_content)
 
-        # Substitute each variable
-        substituted_content = template_content
-        for var_name in matches:
-            placeholder = f'{{{var_name}}}'
-            value = str(variables.get(var_name, ''))
-            substituted_content = substituted_content.replace(placeholder, value)
+    @staticmethod
+    def _substitute_and_collect(template_content, variables, found):
+        """substitute_variables that also adds each variable name to found"""
+        if not template_content:
+            return template_content
+
+        def replace(match):
+            found.add(match.group(1))
+            return str(variables.get(match.group(1), ''))
 
-        return substituted_content
+        return _PLACEHOLDER_RE.sub(replace, template_content)
 
     @staticmethod
     def extract_variables(template_content):
@@ -369,8 +392,7 @@ class EmailTemplate:
         if not template_content:
             return []
 
-        pattern = r'\{([^}]+)\}'
-        matches = re.findall(pattern, template_content)
+        matches = _PLACEHOLDER_RE.findall(template_content)
         return list(set(matches))  # Return unique variable names
 
     @staticmethod
@@ -397,14 +419,11 @@ class EmailTemplate:
         if 'current_date' not in variables:
             variables['current_date'] = datetime.now().strftime('%Y-%m-%d')
 
-        # Extract variables from template
-        subject_vars = EmailTemplate.extract_variables(template['subject_template'])
-        body_vars = EmailTemplate.extract_variables(template['body_template'])
-        all_vars = list(set(subject_vars + body_vars))
-
-        # Substitute variables
-        subject_substituted = EmailTemplate.substitute_variables(template['subject_template'], variables)
-        body_substituted = EmailTemplate.substitute_variables(template['body_template'], variables)
+        # Substitute variables, collecting the names found along the way
+        found = set()
+        subject_substituted = EmailTemplate._substitute_and_collect(template['subject_template'], variables, found)
+        body_substituted = EmailTemplate._substitute_and_collect(template['body_template'], variables, found)
+        all_vars = list(found)
 
         return {
             'template_id': template_id,
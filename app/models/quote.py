@@ -48,21 +48,15 @@ class Quote:
                       mpsf_link, folder_link, method_link))
 
             quote_id = cursor.lastrowid
-            conn.commit()
 
-            # Add default tasks
+            # Add default tasks, copied in one statement and committed
+            # together with the quote
             cursor.execute('''
-                SELECT id, label, is_separator
+                INSERT INTO tasks (quote_id, label, is_separator)
+                SELECT ?, label, is_separator
                 FROM default_tasks
                 ORDER BY sort_order
-            ''')
-
-            default_tasks = cursor.fetchall()
-            for task in default_tasks:
-                cursor.execute('''
-                    INSERT INTO tasks (quote_id, label, is_separator)
-                    VALUES (?, ?, ?)
-                ''', (quote_id, task['label'], task['is_separator']))
+            ''', (quote_id,))
 
             conn.commit()
             return quote_id
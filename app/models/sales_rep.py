@@ -135,35 +135,21 @@ class SalesRep:
             if phone is not None and not SalesRep.validate_phone(phone):
                 raise ValueError("Invalid phone format")
 
-            # Build update query based on provided parameters
-            query_parts = []
-            params = []
-
-            if name is not None:
-                query_parts.append("name = ?")
-                params.append(name)
-
-            if email is not None:
-                query_parts.append("email = ?")
-                params.append(email)
-
-            if phone is not None:
-                query_parts.append("phone = ?")
-                params.append(phone)
-
-            if is_active is not None:
-                query_parts.append("is_active = ?")
-                params.append(1 if is_active else 0)
-
-            if not query_parts:
+            if name is None and email is None and phone is None and is_active is None:
                 return False
 
-            # Always update updated_at when making changes
-            query_parts.append("updated_at = CURRENT_TIMESTAMP")
-            query = f"UPDATE sales_reps SET {', '.join(query_parts)} WHERE id = ?"
-            params.append(rep_id)
-
-            cursor.execute(query, params)
+            # One fixed statement; a None parameter keeps the current value
+            cursor.execute('''
+                UPDATE sales_reps
+                SET name = COALESCE(?, name),
+                    email = COALESCE(?, email),
+                    phone = COALESCE(?, phone),
+                    is_active = COALESCE(?, is_active),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (name, email, phone,
+                  None if is_active is None else (1 if is_active else 0),
+                  rep_id))
             conn.commit()
             return cursor.rowcount > 0
 
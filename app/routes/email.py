@@ -652,7 +652,7 @@ def send_vendor_email(vendor_quote_id):
         status = 'test_sent' if to_email == test_email else 'sent'
         email_status = 'current'  # New emails are always 'current' by default
 
-        history_id = EmailHistory.create(
+        history_id, sent_at = EmailHistory.create(
             quote_id=variables['quote_id'],
             vendor_quote_id=vendor_quote_id,
             vendor_id=vendor['id'],
@@ -662,9 +662,10 @@ def send_vendor_email(vendor_quote_id):
             template_id=template['id'],
             status=status,
             email_status=email_status,
-            gas_response=str(gas_response),
+            gas_response=gas_response,
             cc_emails=all_cc_emails,  # Include all CC recipients (auto + manual)
-            bcc_emails=bcc_emails
+            bcc_emails=bcc_emails,
+            with_sent_at=True
         )
 
         # Update vendor quote status to 'Sent' when email is successfully sent
@@ -687,6 +688,7 @@ def send_vendor_email(vendor_quote_id):
             'success': True,
             'data': {
                 'email_id': history_id,
+                'sent_at': sent_at,
                 'final_subject': subject,
                 'final_body': body,
                 'template_used': template,
@@ -758,23 +760,33 @@ def get_all_email_history():
         limit = int(request.args.get('limit', 100))
         offset = int(request.args.get('offset', 0))
         search = request.args.get('search')
+        after_sent_at = request.args.get('after_sent_at')
+        after_id = request.args.get('after_id', type=int)
 
         if search:
-            history = EmailHistory.search(search, limit, offset)
+            history = EmailHistory.search(search, limit, offset, after_sent_at, after_id)
         else:
-            history = EmailHistory.get_all(limit, offset)
+            history = EmailHistory.get_all(limit, offset, after_sent_at, after_id)
 
         # Get total count for pagination
         total_count = EmailHistory.get_count()
 
+        pagination = {
+            'limit': limit,
+            'offset': offset,
+            'total': total_count
+        }
+        # Keyset for the next page, with or without a search
+        if history and len(history) == limit:
+            pagination['next_cursor'] = {
+                'after_sent_at': history[-1]['sent_at'],
+                'after_id': history[-1]['id']
+            }
+
         return jsonify({
             'success': True,
             'data': history,
-            'pagination': {
-                'limit': limit,
-                'offset': offset,
-                'total': total_count
-            }
+            'pagination': pagination
         })
     except Exception as e:
         return jsonify({
@@ -809,8 +821,8 @@ def update_email_status(email_id):
         success = EmailHistory.update_email_status(email_id, email_status)
 
         if success:
-            # Get updated email record
-            updated_email = EmailHistory.get_by_id(email_id)
+            # Get updated email record; the body is not needed here
+            updated_email = EmailHistory.get_meta_by_id(email_id)
             return jsonify({
                 'success': True,
                 'data': updated_email,
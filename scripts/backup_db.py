@@ -64,6 +64,7 @@ class BackupManager:
         """
         logger.info(f"Creating backup: {backup_path.name}")
 
+        source = backup = None
         try:
             # Connect to source database
             source = sqlite3.connect(str(self.db_path))
@@ -72,19 +73,25 @@ class BackupManager:
             # SQLite online backup - atomic and safe during writes
             source.backup(backup)
 
-            backup.close()
-            source.close()
-
             logger.info(f"✓ Backup completed: {backup_path.name}")
             return True
 
         except Exception as e:
             logger.error(f"✗ Backup failed: {e}")
+            if backup:
+                backup.close()
+                backup = None
             # Clean up failed backup
             if backup_path.exists():
                 backup_path.unlink()
             return False
 
+        finally:
+            if backup:
+                backup.close()
+            if source:
+                source.close()
+
     def rotate_backups(self, directory, keep_count):
         """Remove oldest backups, keeping only the most recent N"""
         backups = sorted(directory.glob("*.db"), key=os.path.getmtime, reverse=True)